@@ -132,6 +132,7 @@ def cli_chat(
     debug: bool = typer.Option(False, "--debug", "-d", help="Enable debug mode to see LLM interactions"),
     model_name: str = typer.Option("anthropic/claude-3-5-sonnet-20240620", "--model", "-m", help="LLM model to use"),
     system_prompt: Optional[str] = typer.Option(None, "--system", "-s", help="System prompt for the assistant"),
+    resume: Optional[str] = typer.Option(None, "--resume", "-r", help="Session id of a previous Claude Code chat to resume"),
 ):
     """Run the bespoken chat assistant from CLI."""
     return chat(
@@ -139,7 +140,8 @@ def cli_chat(
         model_name=model_name,
         system_prompt=system_prompt,
         tools=None,
-        slash_commands=None
+        slash_commands=None,
+        resume=resume
     )
 
 
@@ -149,6 +151,7 @@ def chat(
     system_prompt: Optional[str] = None,
     tools: list = None,
     slash_commands: dict = None,
+    resume: Optional[str] = None,
 ):
     """Run the bespoken chat assistant."""
     # Set debug mode globally
@@ -167,13 +170,13 @@ def chat(
         ui.print("")
     
     
+    use_claude = "claude" in model_name.lower()
     try:
         # Check if using claude via our simple wrapper
-        if "claude" in model_name.lower():
+        if use_claude:
             from .claude_simple import get_model
             model = get_model(model_name)
             ui.print("[cyan]Using Claude Code CLI[/cyan]")
-            ui.print("")
         else:
             # Use standard llm library
             import llm
@@ -182,7 +185,19 @@ def chat(
         ui.print(f"[red]Error loading model '{model_name}': {e}[/red]")
         raise typer.Exit(1)
     
-    conversation = model.conversation(system=system_prompt, tools=tools)
+    if use_claude:
+        conversation = model.conversation(system=system_prompt, tools=tools, session_id=resume)
+        if resume and conversation.messages:
+            ui.print(f"[dim]Resumed session with {len(conversation.messages)} messages[/dim]")
+        elif resume:
+            ui.print(f"[yellow]No saved messages for session {resume}; starting fresh[/yellow]")
+        ui.print(f"[dim]Session {conversation.session_id} • continue later with --resume {conversation.session_id}[/dim]")
+        ui.print("")
+    else:
+        if resume:
+            ui.print("[yellow]--resume only works with Claude Code models; starting a new chat[/yellow]")
+            ui.print("")
+        conversation = model.conversation(system=system_prompt, tools=tools)
     
     try:
         while True:
@@ -225,7 +240,7 @@ def chat(
             padded_spinner = Columns([Text(" " * ui.LEFT_PADDING), Spinner("dots"), spinner_text], expand=False)
             response_started = False
             
-            with Live(padded_spinner, console=console, refresh_per_second=10) as live:
+            with Live(padded_spinner, console=console, refresh_per_second=4) as live:
                 # Check if model supports streaming
                 if hasattr(conversation, 'stream'):
                     # Use streaming for Claude Code and other models that support it
@@ -263,6 +278,10 @@ def chat(
         ui.print("")  # Add newlines
         ui.print("[cyan]Thanks for using Bespoken. Goodbye![/cyan]")
         ui.print("")  # Add final newline
+    finally:
+        # Stop the persistent claude session, if the model keeps one
+        if hasattr(conversation, 'close'):
+            conversation.close()
 
 
 def main():
@@ -3,12 +3,34 @@ Minimal wrapper to make 'claude -p' work as a drop-in replacement for llm.
 Simple, fast, and actually works.
 """
 
-import subprocess
+import ast
+import asyncio
+import contextlib
 import json
+import shutil
+import sqlite3
 import re
-import time
-from typing import Optional, List, Dict, Any, Iterator
-from dataclasses import dataclass
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, AsyncIterator, Callable, Tuple, Pattern, Deque
+from dataclasses import dataclass, asdict
+
+from . import config
+from .history import HistoryStore
+
+
+# Seconds to wait for claude to produce output before giving up on a turn
+TIMEOUT = 60
+
+# Max bytes per stream-json line; assistant messages can be large
+STREAM_LIMIT = 16 * 1024 * 1024
+
+# Most messages kept in the local transcript (replayed into fresh sessions)
+MAX_MESSAGES = 200
+
+# Model context window in tokens; the transcript is halved at 80% of it
+CONTEXT_WINDOW = 200_000
 
 
 @dataclass 
@@ -21,122 +43,317 @@ class Message:
 class ClaudeModel:
     """Minimal wrapper around claude CLI that looks like an llm model."""
     
+    # Absolute path of the claude executable, looked up once per process
+    _claude_path: Optional[str] = None
+    
     def __init__(self, model_name: str = "claude"):
         self.model_name = model_name
-        # Check claude is available
-        try:
-            subprocess.run(["claude", "--version"], capture_output=True, check=True, timeout=2)
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        # Check claude is available (a PATH lookup, no need to run it)
+        if ClaudeModel._claude_path is None:
+            ClaudeModel._claude_path = shutil.which("claude")
+        if ClaudeModel._claude_path is None:
             raise RuntimeError(
                 "Claude Code CLI not found. Install with:\n"
                 "npm install -g @anthropic/claude-code"
             )
     
-    def conversation(self, system: Optional[str] = None, tools: Optional[List] = None):
-        """Create a conversation (llm compatible interface)."""
-        return ClaudeConversation(system, tools)
+    def conversation(self, system: Optional[str] = None, tools: Optional[List] = None,
+                     session_id: Optional[str] = None, history: bool = True):
+        """Create a conversation (llm compatible interface); pass session_id to resume one."""
+        return ClaudeConversation(system, tools, session_id, history)
 
 
 class ClaudeConversation:
-    """Handles a conversation with Claude."""
+    """Handles a conversation with Claude over one long-lived claude process."""
     
-    def __init__(self, system: Optional[str] = None, tools: Optional[List] = None):
+    def __init__(self, system: Optional[str] = None, tools: Optional[List] = None,
+                 session_id: Optional[str] = None, history: bool = True):
         self.system = system
         self.tools = tools or []
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = deque(maxlen=MAX_MESSAGES)
+        self._char_count = 0  # total content length of self.messages
+        
+        # Every message is also appended to the SQLite history, so a session
+        # can be resumed after a crash or restart by passing its id back in.
+        # history=False keeps the conversation in memory only.
+        self.session_id = session_id or uuid.uuid4().hex
+        self._next_idx = 0
+        self._store = self._open_store() if history else None
+        if session_id and self._store is not None:
+            for idx, role, content in self._store.tail(session_id, MAX_MESSAGES):
+                self._record(Message(role, content), persist=False)
+                self._next_idx = idx + 1
+        
+        # Tool names don't change during a conversation, so build the
+        # name -> method map and its regex once and share it with responses
+        self._tool_dispatch = _build_tool_dispatch(self.tools)
+        # The claude session lives on a private event loop so the sync,
+        # llm-compatible methods below can drive it turn after turn.
+        self._loop = asyncio.new_event_loop()
+        self._proc: Optional[asyncio.subprocess.Process] = None
+    
+    def _run(self, coro):
+        """Run a coroutine on this conversation's event loop."""
+        return self._loop.run_until_complete(coro)
     
-    def _run_claude(self, prompt: str) -> str:
-        """Run claude -p and get response."""
-        cmd = ["claude", "-p", prompt]
+    async def _ensure_session(self) -> asyncio.subprocess.Process:
+        """Start the persistent claude process if it isn't running yet."""
+        if self._proc is not None and self._proc.returncode is None:
+            return self._proc
         
+        cmd = [
+            ClaudeModel._claude_path or "claude", "-p",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",
+        ]
         if self.system:
             cmd.extend(["--system-prompt", self.system])
         
-        # Add conversation context if we have history
-        if self.messages:
-            # Include recent context
-            context_messages = self.messages[-6:]  # Last 3 exchanges
-            context = "\n\n".join([
-                f"{msg.role.upper()}: {msg.content}" 
-                for msg in context_messages
-            ])
-            full_prompt = f"{context}\n\nUSER: {prompt}"
-            cmd[2] = full_prompt
-        
-        # Debug output if enabled
+        # Debug output if enabled (read live: /debug toggles it mid-session)
+        if config.DEBUG_MODE:
+            # Show the actual command being executed
+            cmd_str = ' '.join(f'"{arg}"' if ' ' in arg else arg for arg in cmd)
+            print(f">>> Executing: {cmd_str}")
+        
+        self._proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+        return self._proc
+    
+    async def _close_session(self):
+        """Kill the claude process, e.g. after a timeout left it mid-turn."""
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+    
+    def _open_store(self) -> Optional[HistoryStore]:
+        """Open the history database; chat still works without one."""
         try:
-            from . import config
-            if getattr(config, 'DEBUG_MODE', False):
-                # Show the actual command being executed
-                cmd_str = ' '.join(f'"{arg}"' if ' ' in arg else arg for arg in cmd)
-                print(f">>> Executing: {cmd_str}")
-        except ImportError:
-            pass
+            return HistoryStore(max_messages=MAX_MESSAGES)
+        except (sqlite3.Error, OSError):
+            return None
+    
+    def _record(self, message: Message, persist: bool = True):
+        """Append to the transcript, keeping the running size in step."""
+        if len(self.messages) == self.messages.maxlen:
+            # The deque is about to drop its oldest message
+            self._char_count -= len(self.messages[0].content)
+        self.messages.append(message)
+        self._char_count += len(message.content)
+        
+        if persist and self._store is not None:
+            try:
+                self._store.append(self.session_id, self._next_idx, message.role, message.content)
+            except sqlite3.Error:
+                # e.g. disk full or locked; keep chatting without history
+                self._store = None
+            self._next_idx += 1
+    
+    def _trim_history(self):
+        """Drop the oldest half of the transcript once it nears the context window."""
+        # ~4 characters per token is close enough for a budget check
+        if self._char_count / 4 > 0.8 * CONTEXT_WINDOW:
+            for _ in range(len(self.messages) // 2):
+                self._char_count -= len(self.messages.popleft().content)
+    
+    def _history_payload(self, messages: List[Message]) -> str:
+        """Serialize earlier messages as a structured JSON transcript."""
+        transcript = json.dumps(
+            {"messages": [asdict(msg) for msg in messages]},
+            ensure_ascii=False,
+        )
+        return f"Conversation so far:\n{transcript}"
+    
+    async def _turn(self, prompt: str) -> AsyncIterator[str]:
+        """Send one user message and yield assistant text until the turn ends."""
+        fresh = self._proc is None or self._proc.returncode is not None
+        proc = await self._ensure_session()
         
-        # Run claude
+        content = [{"type": "text", "text": prompt}]
+        # A new process knows nothing of earlier turns (first turn, or after a
+        # timeout/crash), so replay them ahead of the prompt. The transcript is
+        # append-only, so the replayed prefix is identical between restarts.
+        self._trim_history()
+        history = list(islice(self.messages, len(self.messages) - 1))  # the last message is this prompt
+        if fresh and history:
+            content.insert(0, {"type": "text", "text": self._history_payload(history)})
+        event = {"type": "user", "message": {"role": "user", "content": content}}
+        proc.stdin.write(json.dumps(event).encode() + b"\n")
+        await proc.stdin.drain()
+        
+        first = True
+        ended = False
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60,
-                check=True
-            )
-            return result.stdout.strip()
-            
-        except subprocess.CalledProcessError as e:
-            # Return error as response rather than crashing
-            return f"Error: {e.stderr.strip() if e.stderr else 'Command failed'}"
-        except subprocess.TimeoutExpired:
-            return "Error: Request timed out after 60 seconds"
+            while True:
+                line = await asyncio.wait_for(proc.stdout.readline(), TIMEOUT)
+                if not line:
+                    # claude exited; surface whatever it complained about
+                    stderr = (await proc.stderr.read()).decode(errors="replace").strip()
+                    raise RuntimeError(stderr or "Command failed")
+                
+                event = json.loads(line)
+                if event.get("type") == "assistant":
+                    for block in event.get("message", {}).get("content", []):
+                        if block.get("type") == "text" and block.get("text"):
+                            yield block["text"] if first else "\n\n" + block["text"]
+                            first = False
+                elif event.get("type") == "result":
+                    ended = True
+                    if event.get("is_error"):
+                        raise RuntimeError(event.get("result") or "Command failed")
+                    return
+        finally:
+            if not ended:
+                # Stopped before the result event (timeout, bad output, exit):
+                # the rest of this turn would be read as the next answer
+                await self._close_session()
+    
+    async def _stream_claude(self, prompt: str) -> AsyncIterator[str]:
+        """Run one turn in the claude session, yielding text as it arrives."""
+        try:
+            async for chunk in self._turn(prompt):
+                yield chunk
+        except asyncio.TimeoutError:
+            yield f"Error: Request timed out after {TIMEOUT} seconds"
         except Exception as e:
-            return f"Error: {str(e)}"
+            # Return error as response rather than crashing
+            yield f"Error: {str(e)}"
+    
+    async def _run_claude(self, prompt: str) -> str:
+        """Run one turn in the claude session and get the response."""
+        chunks = [chunk async for chunk in self._stream_claude(prompt)]
+        return "".join(chunks).strip()
+    
+    def close(self):
+        """Stop the claude process and release the event loop and history."""
+        if self._loop.is_closed():
+            return
+        self._run(self._close_session())
+        self._loop.close()
+        if self._store is not None:
+            self._store.close()
+    
+    def _abandon_turn(self, turn: Optional[AsyncIterator[str]], pending: Optional[asyncio.Task]):
+        """Stop a half-read turn and kill its claude process."""
+        if pending is not None and not pending.done():
+            # Interrupted inside run_until_complete: the read is still pending,
+            # and the generator can't be closed while it's running
+            pending.cancel()
+            with contextlib.suppress(BaseException):
+                self._run(pending)
+        if turn is not None:
+            with contextlib.suppress(RuntimeError):
+                self._run(turn.aclose())
+        self._run(self._close_session())
     
     def chain(self, prompt: str, **kwargs) -> 'ClaudeResponse':
         """Send prompt and get response (non-streaming)."""
         # Record user message
-        self.messages.append(Message("user", prompt))
+        self._record(Message("user", prompt))
         
-        # Get response
-        response_text = self._run_claude(prompt)
+        # Get response, as a task so a Ctrl-C can stop it mid-turn
+        pending = self._loop.create_task(self._run_claude(prompt))
+        try:
+            response_text = self._run(pending)
+        except BaseException:
+            # The task would keep reading claude's output, and the next turn
+            # would start a second reader on the same pipe
+            self._abandon_turn(None, pending)
+            self._record(Message("assistant", ""))
+            raise
         
         # Record assistant response
-        self.messages.append(Message("assistant", response_text))
+        self._record(Message("assistant", response_text))
         
         # Create response object that can handle tools
-        return ClaudeResponse(response_text, self.tools)
+        return ClaudeResponse(response_text, self.tools, self._tool_dispatch)
     
     def stream(self, prompt: str, **kwargs) -> Iterator['StreamChunk']:
-        """Stream response. Claude CLI doesn't support streaming, so simulate it."""
+        """Stream response, yielding each piece of text as claude emits it."""
         # Record user message
-        self.messages.append(Message("user", prompt))
-        
-        # Get the full response first
-        response_text = self._run_claude(prompt)
+        self._record(Message("user", prompt))
         
-        # Record assistant response
-        self.messages.append(Message("assistant", response_text))
-        
-        # Simulate streaming by yielding chunks with small delays
-        words = response_text.split()
-        
-        for i, word in enumerate(words):
-            # Yield word with space (except for last word)
-            word_with_space = word + (" " if i < len(words) - 1 else "")
-            yield StreamChunk(word_with_space)
-            time.sleep(0.02)  # Small delay for streaming effect
+        chunks = []
+        turn = self._stream_claude(prompt)
+        pending = None
+        finished = False
+        try:
+            while True:
+                pending = self._loop.create_task(_next_chunk(turn))
+                try:
+                    chunk = self._run(pending)
+                except StopAsyncIteration:
+                    finished = True
+                    break
+                pending = None
+                chunks.append(chunk)
+                yield StreamChunk(chunk)
+        finally:
+            if not finished:
+                # Abandoned mid-turn (consumer stopped, or Ctrl-C while waiting);
+                # the rest of this turn's output would otherwise be read as the
+                # answer to the next prompt. Cleanup errors must not replace the
+                # exception that got us here.
+                self._abandon_turn(turn, pending)
+            
+            # Record assistant response
+            self._record(Message("assistant", "".join(chunks).strip()))
+
+
+async def _next_chunk(turn: AsyncIterator[str]) -> str:
+    """Await the next chunk of a turn (a coroutine, so it can run as a task)."""
+    return await turn.__anext__()
+
+
+def _build_tool_dispatch(tools: List) -> Tuple[Dict[str, Callable], Optional[Pattern]]:
+    """Map tool method names to bound methods and compile a matcher for them."""
+    tool_map: Dict[str, Callable] = {}
+    for tool in tools:
+        for name in dir(tool):
+            # Private helpers aren't tools; the first tool to offer a name wins
+            if name.startswith("_") or name in tool_map:
+                continue
+            method = getattr(tool, name, None)
+            if callable(method):
+                tool_map[name] = method
+    
+    if not tool_map:
+        return tool_map, None
+    
+    # One alternation of the known names, so other identifiers fail fast
+    names = "|".join(map(re.escape, tool_map))
+    return tool_map, re.compile(r'\b(' + names + r')\s*\(\s*([^)]*)\s*\)')
+
+
+# One call argument: a whole "..." or '...' string, or anything up to a comma
+_ARG_RE = re.compile(r"""\s*(?:"[^"]*"|'[^']*')\s*(?=,|$)|[^,]*""")
+
+
+def _unquote(arg: str) -> str:
+    """Remove one pair of matching quotes around an argument."""
+    if len(arg) >= 2 and arg[0] in "\"'" and arg[-1] == arg[0]:
+        return arg[1:-1]
+    return arg
 
 
 class ClaudeResponse:
     """Response object that handles tool execution."""
     
-    def __init__(self, text: str, tools: Optional[List] = None):
+    def __init__(self, text: str, tools: Optional[List] = None,
+                 tool_dispatch: Optional[Tuple[Dict[str, Callable], Optional[Pattern]]] = None):
         self._text = text
         self.tools = tools or []
         self.usage = {"input_tokens": 0, "output_tokens": len(text.split())}
         
         # Execute tools if found
         if self.tools:
+            self._tool_map, self._tool_re = tool_dispatch or _build_tool_dispatch(self.tools)
             self._execute_tools()
     
     def text(self) -> str:
@@ -145,73 +362,54 @@ class ClaudeResponse:
     
     def _execute_tools(self):
         """Parse response for tool calls and execute them."""
-        # Look for function call patterns
-        # Patterns: function_name("arg") or function_name('arg') or function_name(arg1, arg2)
-        pattern = r'\b(\w+)\s*\(\s*([^)]*)\s*\)'
+        # Matches known_tool("arg") or known_tool('arg') or known_tool(arg1, arg2)
+        if self._tool_re is None:
+            return
         
-        for match in re.finditer(pattern, self._text):
+        for match in self._tool_re.finditer(self._text):
             func_name = match.group(1)
             args_str = match.group(2)
             
-            # Check if this function exists in our tools
-            for tool in self.tools:
-                if hasattr(tool, func_name):
-                    try:
-                        # Parse arguments
-                        args = self._parse_args(args_str)
-                        
-                        # Get the method
-                        method = getattr(tool, func_name)
-                        
-                        # Execute based on argument count
-                        if not args:
-                            result = method()
-                        elif len(args) == 1:
-                            result = method(args[0])
-                        elif len(args) == 2:
-                            result = method(args[0], args[1])
-                        elif len(args) == 3:
-                            result = method(args[0], args[1], args[2])
-                        else:
-                            result = method(*args)
-                        
-                        # Tool executed successfully
-                        # In a more complete implementation, we might want to
-                        # feed results back to Claude
-                        
-                    except Exception as e:
-                        # Tool execution failed, but don't crash
-                        print(f"Tool execution error: {e}")
-    
-    def _parse_args(self, args_str: str) -> List[str]:
-        """Simple argument parser."""
+            try:
+                # Parse arguments
+                args = self._parse_args(args_str)
+                
+                # Execute with whatever arguments were given
+                result = self._tool_map[func_name](*args)
+                
+                # Tool executed successfully
+                # In a more complete implementation, we might want to
+                # feed results back to Claude
+                
+            except Exception as e:
+                # Tool execution failed, but don't crash
+                print(f"Tool execution error: {e}")
+    
+    def _parse_args(self, args_str: str) -> List[Any]:
+        """Parse call arguments: Python literals first, bare words otherwise."""
         if not args_str.strip():
             return []
         
-        # Handle quoted strings
+        # Quoted strings, numbers etc: "a.txt", 'b', 3 -> ["a.txt", "b", 3]
+        try:
+            return list(ast.literal_eval("(" + args_str + ",)"))
+        except (ValueError, SyntaxError):
+            pass
+        
+        # Bare words like read_file(notes.txt): split on commas outside quotes
         args = []
-        current = ""
-        in_quotes = False
-        quote_char = None
-        
-        for char in args_str:
-            if char in ['"', "'"] and not in_quotes:
-                in_quotes = True
-                quote_char = char
-            elif char == quote_char and in_quotes:
-                in_quotes = False
-                quote_char = None
-            elif char == ',' and not in_quotes:
-                args.append(current.strip())
-                current = ""
-            else:
-                current += char
-        
-        if current.strip():
-            args.append(current.strip())
+        pos = 0
+        while pos <= len(args_str):
+            match = _ARG_RE.match(args_str, pos)
+            args.append(match.group())
+            pos = match.end() + 1
+        
+        # A trailing comma doesn't add an empty argument
+        if not args[-1].strip():
+            args.pop()
         
         # Remove quotes from arguments
-        return [arg.strip('"\'') for arg in args]
+        return [_unquote(arg.strip()) for arg in args]
 
 
 @dataclass
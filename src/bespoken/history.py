@@ -0,0 +1,75 @@
+"""Conversation history for bespoken, kept in SQLite so sessions survive restarts."""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# Where conversation history is stored between runs
+DEFAULT_PATH = Path.home() / ".bespoken" / "history.db"
+
+# Most recent sessions kept; older ones are deleted when the store opens
+MAX_SESSIONS = 20
+
+
+class HistoryStore:
+    """Message log, one row per message, grouped by session and kept bounded."""
+
+    def __init__(self, path: Optional[Path] = None, max_messages: int = 200):
+        path = Path(path or DEFAULT_PATH).expanduser()
+        # Only the newest max_messages of a session are ever read back
+        self._max_messages = max_messages
+        # Chats include file contents and pasted text: keep them private
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        path.touch(mode=0o600)
+        for file in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+            if file.exists():
+                os.chmod(file, 0o600)
+
+        # Autocommit, with WAL so each append is one small sequential write
+        self._conn = sqlite3.connect(str(path), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, "
+            "idx INTEGER NOT NULL, "
+            "role TEXT NOT NULL, "
+            "content TEXT NOT NULL, "
+            "PRIMARY KEY (session_id, idx))"
+        )
+        self._prune()
+
+    def append(self, session_id: str, idx: int, role: str, content: str) -> None:
+        """Store one message at position idx of a session."""
+        self._conn.execute(
+            "INSERT INTO messages (session_id, idx, role, content) VALUES (?, ?, ?, ?)",
+            (session_id, idx, role, content),
+        )
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id = ? AND idx <= ?",
+            (session_id, idx - self._max_messages),
+        )
+
+    def tail(self, session_id: str, limit: int) -> List[Tuple[int, str, str]]:
+        """Return the last `limit` (idx, role, content) rows of a session, oldest first."""
+        rows = self._conn.execute(
+            "SELECT idx, role, content FROM messages WHERE session_id = ? "
+            "ORDER BY idx DESC LIMIT ?",
+            (session_id, limit),
+        ).fetchall()
+        return rows[::-1]
+
+    def _prune(self) -> None:
+        """Delete all but the MAX_SESSIONS most recently written sessions."""
+        self._conn.execute(
+            "DELETE FROM messages WHERE session_id NOT IN ("
+            "SELECT session_id FROM messages GROUP BY session_id "
+            "ORDER BY MAX(rowid) DESC LIMIT ?)",
+            (MAX_SESSIONS,),
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -1,8 +1,11 @@
 """File tools for the bespoken assistant."""
 
-from typing import Optional
+from typing import List, Optional, Tuple
 from pathlib import Path
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 import difflib
+import os
 import re
 import llm
 from rich import get_console
@@ -11,11 +14,143 @@ from rich.prompt import Confirm, Prompt
 from .. import ui
 
 
+# Files are cut off after this many characters when read for the LLM
+MAX_READ_CHARS = 50_000
+
+# Unified diff hunk header: @@ -old_start[,old_len] +new_start[,new_len] @@
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+
+def _read_text_limited(path: Path) -> str:
+    """Read at most MAX_READ_CHARS characters of a UTF-8 file."""
+    # A UTF-8 character is at most 4 bytes, so this many bytes always covers
+    # MAX_READ_CHARS characters; the extra byte tells us the file is longer.
+    with path.open("rb") as f:
+        raw = f.read(MAX_READ_CHARS * 4 + 1)
+    
+    content = raw.decode("utf-8", errors="replace")
+    if len(content) > MAX_READ_CHARS:
+        content = content[:MAX_READ_CHARS] + "\n... (truncated)"
+    return content
+
+
+def _read_for_edit(path: Path) -> Tuple[str, str]:
+    """Read a UTF-8 file as "\n"-separated text, plus its text as on disk."""
+    # The LLM writes old_string with "\n" line breaks, so match against
+    # normalized text and splice the edit back into the original when writing
+    raw = path.read_bytes().decode('utf-8')
+    return raw.replace("\r\n", "\n"), raw
+
+
+def _write_for_edit(path: Path, raw: str, text: str, old_string: str, new_string: str) -> None:
+    """Write text.replace(old_string, new_string) back, keeping untouched line endings."""
+    if "\r\n" not in raw:
+        path.write_bytes(text.replace(old_string, new_string).encode('utf-8'))
+        return
+    
+    # Offset in text of each "\n" that is "\r\n" on disk; every one before a
+    # position shifts it one character further along in raw
+    crlf = [m.start() - i for i, m in enumerate(re.finditer("\r\n", raw))]
+    # Line breaks in the new text follow the file's more common ending
+    newline = "\r\n" if 2 * len(crlf) >= raw.count("\n") else "\n"
+    replacement = new_string.replace("\n", newline)
+    
+    parts = []
+    raw_pos = 0
+    pos = text.find(old_string)
+    while pos != -1:
+        end = pos + len(old_string)
+        raw_start = pos + bisect_left(crlf, pos)
+        parts.append(raw[raw_pos:raw_start])
+        parts.append(replacement)
+        raw_pos = end + bisect_left(crlf, end)
+        pos = text.find(old_string, end)
+    parts.append(raw[raw_pos:])
+    path.write_bytes("".join(parts).encode('utf-8'))
+
+
+def _line_starts(lines: List[str]) -> List[int]:
+    """Character offset at which each line starts, plus the total length."""
+    return list(accumulate(map(len, lines), initial=0))
+
+
+def _line_at(starts: List[int], pos: int) -> int:
+    """Index of the line containing character offset pos."""
+    return max(bisect_right(starts, pos) - 1, 0)
+
+
+def _replacement_spans(original: str, orig_lines: List[str], old_string: str,
+                       context: int) -> List[Tuple[int, int]]:
+    """Line ranges (start, end) of the original touched by str.replace."""
+    starts = _line_starts(orig_lines)
+    
+    spans = []
+    pos = original.find(old_string)
+    while pos != -1:
+        # Run to the end of the line holding the character after the match,
+        # so each span is whole lines before and after the replacement
+        start = _line_at(starts, pos)
+        end = min(_line_at(starts, pos + len(old_string)) + 1, len(orig_lines))
+        if spans and start - spans[-1][1] <= 2 * context:
+            # Close enough that the context windows would overlap: one hunk
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+        pos = original.find(old_string, pos + len(old_string))
+    return spans
+
+
+def _replacement_diff(original: str, new_content: str, old_string: str, new_string: str,
+                      fromfile: str, tofile: str, n: int = 3) -> List[str]:
+    """Unified diff of a str.replace edit, computed only around the changed lines."""
+    orig_lines = original.splitlines(keepends=True)
+    if not old_string:
+        # Replacing "" touches every position; there's no region to narrow to
+        new_lines = new_content.splitlines(keepends=True)
+        return list(difflib.unified_diff(orig_lines, new_lines, fromfile=fromfile, tofile=tofile, n=n))
+    
+    diff_lines = []
+    shift = 0  # lines added minus lines removed by the spans so far
+    for start, end in _replacement_spans(original, orig_lines, old_string, n):
+        # Only the span's own lines change; the new side is spliced from
+        # them instead of re-splitting the whole new file
+        old_region = orig_lines[start:end]
+        new_region = "".join(old_region).replace(old_string, new_string).splitlines(keepends=True)
+        old_lo = max(start - n, 0)
+        new_lo = old_lo + shift
+        shift += len(new_region) - len(old_region)
+        
+        before, after = orig_lines[old_lo:start], orig_lines[end:end + n]
+        hunk = list(difflib.unified_diff(
+            before + old_region + after,
+            before + new_region + after,
+            fromfile=fromfile,
+            tofile=tofile,
+            n=n
+        ))
+        if not hunk:
+            continue
+        if not diff_lines:
+            diff_lines.extend(hunk[:2])  # file headers, once
+        for line in hunk[2:]:
+            if line.startswith('@@'):
+                # Line numbers are relative to the slice; make them absolute
+                line = _HUNK_HEADER_RE.sub(
+                    lambda m: f"@@ -{int(m.group(1)) + old_lo}{m.group(2) or ''} "
+                              f"+{int(m.group(3)) + new_lo}{m.group(4) or ''} @@",
+                    line
+                )
+            diff_lines.append(line)
+    return diff_lines
+
+
 class FileSystem(llm.Toolbox):
     """File system operations toolbox - can work with multiple files and directories."""
     
     def __init__(self, working_directory: str = "."):
         self.working_directory = Path(working_directory).resolve()
+        # Prefix every path inside the working directory starts with
+        self._wd_prefix = os.path.join(str(self.working_directory), "")
     
     def _debug_return(self, value: str) -> str:
         """Helper to show what the LLM receives from tools"""
@@ -23,9 +158,24 @@ class FileSystem(llm.Toolbox):
         return value
         
     def _resolve_path(self, file_path: str) -> Path:
-        if Path(file_path).is_absolute():
-            return Path(file_path).resolve()
-        return (self.working_directory / file_path).resolve()
+        # working_directory is resolved once in __init__, so a lexical join and
+        # normpath rejects ../ and absolute escapes without touching the disk.
+        candidate = os.path.normpath(os.path.join(self._wd_prefix, file_path))
+        if not os.path.join(candidate, "").startswith(self._wd_prefix) or self._escapes_via_symlink(candidate):
+            raise PermissionError(
+                f"Path '{file_path}' is outside the working directory {self.working_directory}"
+            )
+        return Path(candidate)
+    
+    def _escapes_via_symlink(self, candidate: str) -> bool:
+        # Only a symlink below the working directory can lead back out of it,
+        # so lstat just those components and realpath() only once one is found
+        current = str(self.working_directory)
+        for part in candidate[len(self._wd_prefix):].split(os.sep):
+            current = os.path.join(current, part)
+            if os.path.islink(current):
+                return not os.path.join(os.path.realpath(candidate), "").startswith(self._wd_prefix)
+        return False
     
     def list_files(self, directory: Optional[str] = None) -> str:
         """List files and directories."""
@@ -33,13 +183,15 @@ class FileSystem(llm.Toolbox):
         ui.tool_status(f"Listing files in {directory or 'current directory'}...")
         target_dir = self._resolve_path(directory) if directory else self.working_directory
         
-        items = []
-        for item in sorted(target_dir.iterdir()):
-            if item.is_dir():
-                items.append(f"{item.name}/ [DIR]")
-            else:
-                items.append(f"{item.name} ({item.stat().st_size} bytes)")
-                
+        # scandir entries carry the file type from the directory read itself,
+        # so only regular files need a stat() call (for their size)
+        with os.scandir(target_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        items = [
+            f"{entry.name}/ [DIR]" if entry.is_dir() else f"{entry.name} ({entry.stat().st_size} bytes)"
+            for entry in entries
+        ]
+        
         return self._debug_return(f"Files in {target_dir}:\n" + "\n".join(items) if items else "No files found")
     
     def read_file(self, file_path: str) -> str:
@@ -47,11 +199,8 @@ class FileSystem(llm.Toolbox):
         ui.tool_debug(f">>> LLM calling tool: read_file(file_path={repr(file_path)})")
         ui.tool_status(f"Reading file: {file_path}")
         full_path = self._resolve_path(file_path)
-        content = full_path.read_text(encoding='utf-8', errors='replace')
+        content = _read_text_limited(full_path)
         
-        if len(content) > 50_000:
-            content = content[:50_000] + "\n... (truncated)"
-            
         return self._debug_return(content)
     
     def write_file(self, file_path: str, content: str) -> str:
@@ -69,16 +218,18 @@ class FileSystem(llm.Toolbox):
         ui.tool_debug(f">>> LLM calling tool: replace_in_file(file_path={repr(file_path)}, old_string=<{len(old_string)} chars>, new_string=<{len(new_string)} chars>)")
         ui.tool_status(f"Preparing to replace text in: {file_path}")
         full_path = self._resolve_path(file_path)
-        original_content = full_path.read_text(encoding='utf-8')
+        # One binary read and one binary write; no text-mode wrapper either way
+        original_content, raw_content = _read_for_edit(full_path)
         new_content = original_content.replace(old_string, new_string)
         
-        diff_lines = list(difflib.unified_diff(
-            original_content.splitlines(keepends=True),
-            new_content.splitlines(keepends=True),
+        diff_lines = _replacement_diff(
+            original_content,
+            new_content,
+            old_string,
+            new_string,
             fromfile=f"{file_path} (before)",
             tofile=f"{file_path} (after)",
-            n=3
-        ))
+        )
         
         if diff_lines:
             # Show the diff with custom formatting
@@ -95,10 +246,10 @@ class FileSystem(llm.Toolbox):
                     ui.print(f"[dim]{line.rstrip()}[/dim]")
                 elif line.startswith('@@'):
                     # Hunk header - extract line numbers
-                    match = re.search(r'-(\d+)(?:,\d+)? \+(\d+)(?:,\d+)?', line)
+                    match = _HUNK_HEADER_RE.match(line)
                     if match:
                         line_num_old = int(match.group(1))
-                        line_num_new = int(match.group(2))
+                        line_num_new = int(match.group(3))
                     ui.print(f"[cyan]{line.rstrip()}[/cyan]")
                 elif line.startswith('-'):
                     # Removed line
@@ -127,7 +278,7 @@ class FileSystem(llm.Toolbox):
             )
             
             if confirm:
-                full_path.write_text(new_content, encoding='utf-8')
+                _write_for_edit(full_path, raw_content, original_content, old_string, new_string)
                 return self._debug_return(f"Applied changes to '{file_path}'")
             else:
                 ui.tool_error("Changes cancelled. Please provide new instructions.")
@@ -167,11 +318,8 @@ def FileTool(file_path: Optional[str] = None):
             ui.tool_debug(">>> LLM calling tool: read_file()")
             ui.tool_status(f"Reading file: {self.file_path.name}")
             
-            content = self.file_path.read_text(encoding='utf-8', errors='replace')
+            content = _read_text_limited(self.file_path)
             
-            if len(content) > 50_000:
-                content = content[:50_000] + "\n... (truncated)"
-                
             return self._debug_return(content)
         
         def replace_in_file(self, old_string: str, new_string: str) -> str:
@@ -179,16 +327,17 @@ def FileTool(file_path: Optional[str] = None):
             ui.tool_debug(f">>> LLM calling tool: replace_in_file(old_string=<{len(old_string)} chars>, new_string=<{len(new_string)} chars>)")
             ui.tool_status(f"Preparing to replace text in: {self.file_path.name}")
             
-            original_content = self.file_path.read_text(encoding='utf-8')
+            original_content, raw_content = _read_for_edit(self.file_path)
             new_content = original_content.replace(old_string, new_string)
             
-            diff_lines = list(difflib.unified_diff(
-                original_content.splitlines(keepends=True),
-                new_content.splitlines(keepends=True),
+            diff_lines = _replacement_diff(
+                original_content,
+                new_content,
+                old_string,
+                new_string,
                 fromfile=f"{self.file_path.name} (before)",
                 tofile=f"{self.file_path.name} (after)",
-                n=3
-            ))
+            )
             
             if diff_lines:
                 # Show the diff with custom formatting
@@ -205,10 +354,10 @@ def FileTool(file_path: Optional[str] = None):
                         ui.print(f"[dim]{line.rstrip()}[/dim]")
                     elif line.startswith('@@'):
                         # Hunk header - extract line numbers
-                        match = re.search(r'-(\d+)(?:,\d+)? \+(\d+)(?:,\d+)?', line)
+                        match = _HUNK_HEADER_RE.match(line)
                         if match:
                             line_num_old = int(match.group(1))
-                            line_num_new = int(match.group(2))
+                            line_num_new = int(match.group(3))
                         ui.print(f"[cyan]{line.rstrip()}[/cyan]")
                     elif line.startswith('-'):
                         # Removed line
@@ -237,7 +386,7 @@ def FileTool(file_path: Optional[str] = None):
                 )
                 
                 if confirm:
-                    self.file_path.write_text(new_content, encoding='utf-8')
+                    _write_for_edit(self.file_path, raw_content, original_content, old_string, new_string)
                     return self._debug_return(f"Applied changes to '{self.file_path.name}'")
                 else:
                     ui.tool_error("Changes cancelled. Please provide new instructions.")
@@ -4,7 +4,7 @@ from typing import List, Any, Optional
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 
-from prompt_toolkit import prompt
+from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import WordCompleter, FuzzyCompleter
 from prompt_toolkit.styles import Style
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
@@ -50,6 +50,20 @@ _trusted_tools = set()
 # Command history for prompt_toolkit
 _command_history = InMemoryHistory()
 
+# Input prompt style, with auto-suggestion preview in gray
+_input_style = Style.from_dict({
+    # Default text style
+    '': '#ffffff',
+    # Auto-suggestions in gray
+    'auto-suggest': 'fg:#666666',
+    # Selected completion in menu
+    'completion-menu.completion.current': 'bg:#00aaaa #000000',
+    'completion-menu.completion': 'bg:#008888 #ffffff',
+})
+
+# Input session, created on first use and reused for every prompt
+_prompt_session = None
+
 # Global streaming state
 _streaming_state = {
     'current_position': 0,
@@ -133,43 +147,46 @@ def stream_chunk(chunk: str, indent: int = LEFT_PADDING, wrap: bool = True) -> N
     """Stream a single chunk while maintaining state."""
     global _streaming_state
     
-    # Process chunk character by character
-    for char in chunk:
-        if _streaming_state['at_line_start']:
-            # Add padding at start of line
-            _console.print(" " * indent, end="", highlight=False)
-            _streaming_state['at_line_start'] = False
-            _streaming_state['current_position'] = 0
-        
-        if char == '\n':
-            # Print any buffered word
-            if _streaming_state['word_buffer']:
-                _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
-                _streaming_state['word_buffer'] = ""
-            # New line
-            _console.print()
-            _streaming_state['at_line_start'] = True
-        elif char in ' \t' and wrap:
-            # End of word, check if it fits
-            if _streaming_state['word_buffer']:
-                word_length = len(_streaming_state['word_buffer'])
-                if _streaming_state['current_position'] + word_length > _streaming_state['max_line_width']:
-                    # Word doesn't fit, wrap to new line
-                    _console.print()
-                    _streaming_state['at_line_start'] = True
-                    _console.print(" " * indent, end="", highlight=False)
-                    _streaming_state['current_position'] = 0
-                    _streaming_state['at_line_start'] = False
-                # Print the word
-                _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
-                _streaming_state['current_position'] += word_length
-                _streaming_state['word_buffer'] = ""
-            # Print the space
-            _console.print(f"[dim]{char}[/dim]", end="", highlight=False)
-            _streaming_state['current_position'] += 1
-        else:
-            # Add to word buffer
-            _streaming_state['word_buffer'] += char
+    # Hold console output until the whole chunk is laid out, so each
+    # chunk costs one terminal write instead of one per word and space
+    with _console:
+        # Process chunk character by character
+        for char in chunk:
+            if _streaming_state['at_line_start']:
+                # Add padding at start of line
+                _console.print(" " * indent, end="", highlight=False)
+                _streaming_state['at_line_start'] = False
+                _streaming_state['current_position'] = 0
+            
+            if char == '\n':
+                # Print any buffered word
+                if _streaming_state['word_buffer']:
+                    _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
+                    _streaming_state['word_buffer'] = ""
+                # New line
+                _console.print()
+                _streaming_state['at_line_start'] = True
+            elif char in ' \t' and wrap:
+                # End of word, check if it fits
+                if _streaming_state['word_buffer']:
+                    word_length = len(_streaming_state['word_buffer'])
+                    if _streaming_state['current_position'] + word_length > _streaming_state['max_line_width']:
+                        # Word doesn't fit, wrap to new line
+                        _console.print()
+                        _streaming_state['at_line_start'] = True
+                        _console.print(" " * indent, end="", highlight=False)
+                        _streaming_state['current_position'] = 0
+                        _streaming_state['at_line_start'] = False
+                    # Print the word
+                    _console.print(f"[dim]{_streaming_state['word_buffer']}[/dim]", end="", highlight=False)
+                    _streaming_state['current_position'] += word_length
+                    _streaming_state['word_buffer'] = ""
+                # Print the space
+                _console.print(f"[dim]{char}[/dim]", end="", highlight=False)
+                _streaming_state['current_position'] += 1
+            else:
+                # Add to word buffer
+                _streaming_state['word_buffer'] += char
 
 
 def end_streaming(indent: int = LEFT_PADDING, wrap: bool = True) -> None:
@@ -249,29 +266,21 @@ def input(prompt_text: str, indent: int = LEFT_PADDING, completions: Optional[Li
     # Use combined completer for commands and file paths
     completer = create_completer(completions) if completions else None
     
-    # Create a style with auto-suggestion preview in gray
-    style = Style.from_dict({
-        # Default text style
-        '': '#ffffff',
-        # Auto-suggestions in gray
-        'auto-suggest': 'fg:#666666',
-        # Selected completion in menu
-        'completion-menu.completion.current': 'bg:#00aaaa #000000',
-        'completion-menu.completion': 'bg:#008888 #ffffff',
-    })
-    
-    try:
-        # Use prompt_toolkit with completer and auto-suggestions
-        result = prompt(
-            padded_prompt,
-            completer=completer,
-            style=style,
+    global _prompt_session
+    if _prompt_session is None:
+        _prompt_session = PromptSession(
+            style=_input_style,
             complete_while_typing=True,  # Show completions as you type
             auto_suggest=AutoSuggestFromHistory(),  # Suggest from history
             history=_command_history,  # Enable history with up/down arrows
             enable_history_search=False,  # Disable Ctrl+R search
         )
-        return result
+    # Set directly: prompt(completer=None) would keep the previous completer
+    _prompt_session.completer = completer
+    
+    try:
+        # Use prompt_toolkit with completer and auto-suggestions
+        return _prompt_session.prompt(padded_prompt)
     except (KeyboardInterrupt, EOFError):
         raise KeyboardInterrupt()
 
@@ -0,0 +1,291 @@
+"""Tests for the claude CLI wrapper - focusing on parsing tool calls out of responses."""
+
+import os
+import signal
+import sys
+import threading
+
+import pytest
+
+from bespoken import claude_simple, config, history
+from bespoken.claude_simple import ClaudeConversation, ClaudeResponse, Message
+
+
+@pytest.fixture(autouse=True)
+def history_db(tmp_path, monkeypatch):
+    """Keep conversation history out of the real ~/.bespoken during tests."""
+    path = tmp_path / "history.db"
+    monkeypatch.setattr(history, "DEFAULT_PATH", path)
+    return path
+
+
+FAKE_CLAUDE = """#!{python}
+import json, sys, time
+
+def say(text):
+    event = {{"type": "assistant", "message": {{"content": [{{"type": "text", "text": text}}]}}}}
+    print(json.dumps(event), flush=True)
+
+turn = 0
+for line in sys.stdin:
+    turn += 1
+    blocks = json.loads(line)["message"]["content"]
+    prompt = blocks[-1]["text"]
+    if prompt == "garbage":
+        print("not json", flush=True)
+    if prompt == "sleep":
+        say("thinking")
+        time.sleep(30)
+    if prompt == "fail":
+        print(json.dumps({{"type": "result", "is_error": True, "result": "bad thing"}}), flush=True)
+        continue
+    say(f"turn {{turn}}: {{prompt}}")
+    if len(blocks) > 1:
+        say("replayed " + blocks[0]["text"])
+    print(json.dumps({{"type": "result", "is_error": False}}), flush=True)
+"""
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    """A ClaudeModel backed by a fake stream-json claude script on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "claude"
+    script.write_text(FAKE_CLAUDE.format(python=sys.executable))
+    script.chmod(0o755)
+    
+    monkeypatch.setenv("PATH", str(bin_dir), prepend=":")
+    monkeypatch.setattr(claude_simple.ClaudeModel, "_claude_path", None)
+    monkeypatch.setattr(config, "DEBUG_MODE", False)
+    return claude_simple.get_model("claude")
+
+
+@pytest.fixture
+def conversation(model):
+    """A conversation on the fake claude, closed after the test."""
+    conversation = model.conversation()
+    yield conversation
+    conversation.close()
+
+
+class FakeTools:
+    """Minimal toolbox that records the calls it receives."""
+
+    def __init__(self):
+        self.calls = []
+
+    def _debug_return(self, value):
+        self.calls.append(("_debug_return", value))
+
+    def read_file(self, file_path):
+        self.calls.append(("read_file", file_path))
+
+    def list_files(self):
+        self.calls.append(("list_files",))
+
+
+def test_execute_tools_dispatches_known_tools():
+    """Test that tool calls in the response text are executed."""
+    tools = FakeTools()
+    
+    ClaudeResponse('Let me look: read_file("notes.txt") then list_files()', [tools])
+    
+    assert tools.calls == [("read_file", "notes.txt"), ("list_files",)]
+
+
+def test_execute_tools_ignores_unknown_and_private_names():
+    """Test that non-tool identifiers and private helpers are never called."""
+    tools = FakeTools()
+    
+    ClaudeResponse('print("hi") _debug_return("x") myread_file("a") read_files("b")', [tools])
+    
+    assert tools.calls == []
+
+
+def test_execute_tools_first_tool_wins():
+    """Test that a name offered by several tools only runs on the first one."""
+    first, second = FakeTools(), FakeTools()
+    
+    ClaudeResponse('list_files()', [first, second])
+    
+    assert first.calls == [("list_files",)]
+    assert second.calls == []
+
+
+def test_execute_tools_no_tools():
+    """Test that responses without tools don't try to dispatch anything."""
+    response = ClaudeResponse('read_file("notes.txt")')
+    
+    assert response.text() == 'read_file("notes.txt")'
+
+
+def test_transcript_is_bounded(monkeypatch):
+    """Test that the transcript keeps only the newest messages and tracks its size."""
+    monkeypatch.setattr(claude_simple, "MAX_MESSAGES", 4)
+    conversation = ClaudeConversation()
+    
+    for i in range(6):
+        conversation._record(Message("user", "x" * i))
+    
+    assert [msg.content for msg in conversation.messages] == ["xx", "xxx", "xxxx", "xxxxx"]
+    assert conversation._char_count == 14
+    conversation.close()
+
+
+def test_transcript_halved_near_context_window(monkeypatch):
+    """Test that the oldest half of the transcript is dropped when it nears the budget."""
+    monkeypatch.setattr(claude_simple, "CONTEXT_WINDOW", 10)
+    conversation = ClaudeConversation()
+    for i in range(4):
+        conversation._record(Message("user", "y" * 10))
+    
+    conversation._trim_history()
+    
+    assert len(conversation.messages) == 2
+    assert conversation._char_count == 20
+    conversation.close()
+
+
+def test_parse_args_python_literals():
+    """Test that literal arguments keep their quotes' contents and types."""
+    response = ClaudeResponse("")
+    
+    assert response._parse_args("") == []
+    assert response._parse_args('"notes.txt"') == ["notes.txt"]
+    assert response._parse_args("'a, b', \"it's\", 3") == ["a, b", "it's", 3]
+
+
+def test_parse_args_bare_words():
+    """Test that unquoted arguments are split on commas and stripped."""
+    response = ClaudeResponse("")
+    
+    assert response._parse_args("notes.txt") == ["notes.txt"]
+    assert response._parse_args("src/app.py, 'old', \"x, y\"") == ["src/app.py", "old", "x, y"]
+    assert response._parse_args("line one\nline two, b") == ["line one\nline two", "b"]
+    assert response._parse_args("don't panic, 'a'") == ["don't panic", "a"]
+    assert response._parse_args("notes.txt, 'a, b'") == ["notes.txt", "a, b"]
+    assert response._parse_args('"a",') == ["a"]
+    assert response._parse_args("notes.txt,") == ["notes.txt"]
+
+
+def test_conversation_resumes_from_history(history_db):
+    """Test that a new conversation with the same session id picks up the old messages."""
+    first = ClaudeConversation()
+    first._record(Message("user", "hello"))
+    first._record(Message("assistant", "hi there"))
+    first.close()
+    
+    resumed = ClaudeConversation(session_id=first.session_id)
+    resumed._record(Message("user", "again"))
+    resumed.close()
+    
+    assert history_db.exists()
+    assert [msg.content for msg in resumed.messages] == ["hello", "hi there", "again"]
+    assert resumed._char_count == len("hello") + len("hi there") + len("again")
+    
+    store = history.HistoryStore()
+    assert store.tail(first.session_id, 2) == [(1, "assistant", "hi there"), (2, "user", "again")]
+    store.close()
+
+
+def test_history_is_private(tmp_path):
+    """Test that the history directory and database are readable by the owner only."""
+    path = tmp_path / "private" / "history.db"
+    store = history.HistoryStore(path)
+    store.append("a", 0, "user", "secret")
+    store.close()
+    
+    assert path.parent.stat().st_mode & 0o777 == 0o700
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_conversation_without_history_writes_nothing(history_db):
+    """Test that history=False keeps the conversation off disk."""
+    conversation = ClaudeConversation(history=False)
+    conversation._record(Message("user", "hello"))
+    conversation.close()
+    
+    assert not history_db.exists()
+
+
+def test_history_store_is_bounded(history_db, monkeypatch):
+    """Test that old messages and old sessions are pruned from the database."""
+    monkeypatch.setattr(history, "MAX_SESSIONS", 2)
+    store = history.HistoryStore(max_messages=3)
+    for idx in range(5):
+        store.append("a", idx, "user", str(idx))
+    store.append("b", 0, "user", "b")
+    store.append("c", 0, "user", "c")
+    assert store.tail("a", 10) == [(2, "user", "2"), (3, "user", "3"), (4, "user", "4")]
+    store.close()
+    
+    store = history.HistoryStore(max_messages=3)
+    assert store.tail("a", 10) == []
+    assert store.tail("c", 10) == [(0, "user", "c")]
+    store.close()
+
+
+def test_chain_reuses_one_session(conversation):
+    """Test that consecutive turns go to the same claude process."""
+    assert conversation.chain("a").text() == "turn 1: a"
+    assert conversation.chain("b").text() == "turn 2: b"
+
+
+def test_stream_yields_text_and_records_it(conversation):
+    """Test that streaming yields the assistant text and records the exchange."""
+    chunks = [chunk.text for chunk in conversation.stream("a")]
+    
+    assert chunks == ["turn 1: a"]
+    assert [msg.content for msg in conversation.messages] == ["a", "turn 1: a"]
+
+
+def test_error_result_keeps_session(conversation):
+    """Test that an is_error result is reported and the session stays usable."""
+    assert conversation.chain("fail").text() == "Error: bad thing"
+    assert conversation.chain("b").text() == "turn 2: b"
+
+
+def test_timeout_restarts_session_and_replays_history(conversation, monkeypatch):
+    """Test that a timed-out turn kills the process and the next one replays history."""
+    monkeypatch.setattr(claude_simple, "TIMEOUT", 0.5)
+    conversation.chain("a")
+    
+    assert "Error: Request timed out" in conversation.chain("sleep").text()
+    
+    text = conversation.chain("b").text()
+    assert text.startswith("turn 1: b\n\nreplayed Conversation so far:")
+    assert '"content": "turn 1: a"' in text
+
+
+def test_bad_output_restarts_session(conversation):
+    """Test that unparseable output doesn't leak into the next turn."""
+    assert conversation.chain("garbage").text().startswith("Error:")
+    assert conversation.chain("b").text().startswith("turn 1: b")
+
+
+def test_ctrl_c_during_stream_raises_keyboard_interrupt(conversation):
+    """Test that Ctrl-C while waiting on claude surfaces as KeyboardInterrupt."""
+    # A real SIGINT, so it interrupts the blocking select() like Ctrl-C does
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    
+    with pytest.raises(KeyboardInterrupt):
+        for _ in conversation.stream("sleep"):
+            pass
+    timer.join()
+    
+    assert conversation.chain("b").text().startswith("turn 1: b")
+
+
+def test_ctrl_c_during_chain_raises_keyboard_interrupt(conversation):
+    """Test that Ctrl-C during chain() stops the turn and the next one starts clean."""
+    timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    
+    with pytest.raises(KeyboardInterrupt):
+        conversation.chain("sleep")
+    timer.join()
+    
+    assert conversation.chain("b").text().startswith("turn 1: b")
+    assert [msg.content for msg in conversation.messages][:2] == ["sleep", ""]
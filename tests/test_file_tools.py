@@ -6,7 +6,7 @@ from pathlib import Path
 from unittest.mock import patch
 import pytest
 
-from bespoken.tools import FileSystem
+from bespoken.tools import FileSystem, FileTool
 from bespoken import config
 
 
@@ -104,4 +104,170 @@ def test_replace_in_file_with_debug_mode(mock_tool_status, mock_tool_debug, file
     # Check that debug messages were called
     debug_calls = [str(call[0][0]) for call in mock_tool_debug.call_args_list]
     assert any("LLM calling tool: replace_in_file(" in msg for msg in debug_calls)
-    assert any("Tool returning to LLM" in msg for msg in debug_calls)
\ No newline at end of file
+    assert any("Tool returning to LLM" in msg for msg in debug_calls)
+
+
+@patch('builtins.print')
+def test_read_file(mock_print, file_tools, temp_dir):
+    """Test reading a small file returns its full content."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_text("Hello, World!\nSecond line\n")
+    
+    result = file_tools.read_file("test.txt")
+    
+    assert result == "Hello, World!\nSecond line\n"
+
+
+@patch('builtins.print')
+def test_read_file_truncates_large_files(mock_print, file_tools, temp_dir):
+    """Test that large files are cut off after 50,000 characters."""
+    test_file = temp_dir / "big.txt"
+    test_file.write_text("é" * 60_000 + "tail", encoding='utf-8')
+    
+    result = file_tools.read_file("big.txt")
+    
+    assert result == "é" * 50_000 + "\n... (truncated)"
+
+
+@patch('builtins.print')
+def test_read_file_exact_limit_not_truncated(mock_print, file_tools, temp_dir):
+    """Test that a file of exactly 50,000 multi-byte characters is not truncated."""
+    test_file = temp_dir / "limit.txt"
+    test_file.write_text("😀" * 50_000, encoding='utf-8')
+    
+    result = file_tools.read_file("limit.txt")
+    
+    assert result == "😀" * 50_000
+
+
+@patch('rich.prompt.Confirm.ask')
+@patch('bespoken.ui.print')
+def test_replace_in_file_diff_line_numbers(mock_ui_print, mock_confirm, file_tools, temp_dir):
+    """Test that the diff of an edit deep in a file reports absolute line numbers."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+    
+    mock_confirm.return_value = True
+    
+    file_tools.replace_in_file("test.txt", "line 50\n", "line fifty\n")
+    
+    printed = [str(call[0][0]) for call in mock_ui_print.call_args_list if call[0]]
+    assert "[cyan]@@ -47,7 +47,7 @@[/cyan]" in printed
+    assert any("  50 -line 50" in line for line in printed)
+    assert any("  50 +line fifty" in line for line in printed)
+
+
+@patch('rich.prompt.Confirm.ask')
+@patch('builtins.print')
+def test_replace_in_file_keeps_line_endings(mock_print, mock_confirm, file_tools, temp_dir):
+    """Test that replacing text leaves the file's CRLF line endings intact."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_bytes(b"Hello, World!\r\nSecond line\r\n")
+    
+    mock_confirm.return_value = True
+    
+    file_tools.replace_in_file("test.txt", "World", "Python")
+    
+    assert test_file.read_bytes() == b"Hello, Python!\r\nSecond line\r\n"
+
+
+@patch('rich.prompt.Confirm.ask')
+@patch('builtins.print')
+def test_replace_in_file_multiline_crlf(mock_print, mock_confirm, file_tools, temp_dir):
+    """Test that a multi-line "\n" old_string matches in a CRLF file and CRLF is kept."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_bytes(b"one\r\ntwo\r\nthree\r\n")
+    
+    mock_confirm.return_value = True
+    
+    result = file_tools.replace_in_file("test.txt", "one\ntwo", "ONE\nTWO")
+    
+    assert result == "Applied changes to 'test.txt'"
+    assert test_file.read_bytes() == b"ONE\r\nTWO\r\nthree\r\n"
+
+
+@patch('rich.prompt.Confirm.ask')
+@patch('builtins.print')
+def test_replace_in_file_mixed_line_endings(mock_print, mock_confirm, file_tools, temp_dir):
+    """Test that each untouched line keeps its own ending in a mixed CRLF/LF file."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_bytes(b"a\r\nb\nc\nd\n")
+    
+    mock_confirm.return_value = True
+    
+    file_tools.replace_in_file("test.txt", "d", "D")
+    assert test_file.read_bytes() == b"a\r\nb\nc\nD\n"
+    
+    # Spanning a CRLF and an LF: new line breaks take the more common LF
+    file_tools.replace_in_file("test.txt", "a\nb\nc", "x\ny")
+    assert test_file.read_bytes() == b"x\ny\nD\n"
+
+
+@patch('rich.prompt.Confirm.ask')
+@patch('builtins.print')
+def test_file_tool_replace_multiline_crlf(mock_print, mock_confirm, temp_dir):
+    """Test that the single-file tool also matches "\n" edits in CRLF files."""
+    test_file = temp_dir / "test.txt"
+    test_file.write_bytes(b"one\r\ntwo\r\nthree\r\n")
+    
+    mock_confirm.return_value = True
+    
+    result = FileTool(str(test_file)).replace_in_file("two\nthree", "2\n3")
+    
+    assert result == "Applied changes to 'test.txt'"
+    assert test_file.read_bytes() == b"one\r\n2\r\n3\r\n"
+
+
+@patch('builtins.print')
+def test_list_files(mock_print, file_tools, temp_dir):
+    """Test listing a directory shows sorted files with sizes and subdirectories."""
+    (temp_dir / "b.txt").write_text("hello")
+    (temp_dir / "a.txt").write_text("")
+    (temp_dir / "sub").mkdir()
+    
+    result = file_tools.list_files()
+    
+    assert result == f"Files in {temp_dir.resolve()}:\na.txt (0 bytes)\nb.txt (5 bytes)\nsub/ [DIR]"
+
+
+@patch('builtins.print')
+def test_list_files_empty_directory(mock_print, file_tools, temp_dir):
+    """Test listing an empty directory."""
+    (temp_dir / "empty").mkdir()
+    
+    result = file_tools.list_files("empty")
+    
+    assert result == "No files found"
+
+
+@patch('builtins.print')
+def test_paths_outside_working_directory_rejected(mock_print, file_tools, temp_dir):
+    """Test that relative and absolute paths escaping the working directory are refused."""
+    (temp_dir / "inside.txt").write_text("ok")
+    
+    working_dir = file_tools.working_directory  # resolved, e.g. /private/var on macOS
+    assert file_tools.read_file(str(working_dir / "sub" / ".." / "inside.txt")) == "ok"
+    with pytest.raises(PermissionError):
+        file_tools.read_file("../outside.txt")
+    with pytest.raises(PermissionError):
+        file_tools.read_file("/etc/passwd")
+    with pytest.raises(PermissionError):
+        file_tools.write_file(str(working_dir) + "-sibling/x.txt", "nope")
+
+
+@patch('builtins.print')
+def test_symlinks_outside_working_directory_rejected(mock_print, file_tools, temp_dir, tmp_path):
+    """Test that a symlink inside the working directory can't reach files outside it."""
+    (tmp_path / "secret.txt").write_text("secret")
+    (temp_dir / "link").symlink_to(tmp_path, target_is_directory=True)
+    (temp_dir / "inside.txt").write_text("ok")
+    (temp_dir / "alias.txt").symlink_to(temp_dir / "inside.txt")
+    
+    assert file_tools.read_file("alias.txt") == "ok"
+    with patch("os.path.realpath", side_effect=AssertionError("realpath without a symlink")):
+        assert file_tools.read_file("inside.txt") == "ok"
+    with pytest.raises(PermissionError):
+        file_tools.read_file("link/secret.txt")
+    with pytest.raises(PermissionError):
+        file_tools.write_file("link/new.txt", "nope")
+    assert not (tmp_path / "new.txt").exists()